@@ -19,7 +19,7 @@ from .virtualrealization import VirtualRealization
 from .virtualensemble import VirtualEnsemble
 from .ensemblecombination import EnsembleCombination
 from .realization import parse_number
-from .util import shortcut2path
+from .util import GROUPBY_CANDIDATES, shortcut2path
 from .util.dates import unionize_smry_dates
 
 logger = logging.getLogger(__name__)
@@ -1224,14 +1224,18 @@ class ScratchEnsemble(object):
 
         WARNING: This code is duplicated in virtualensemble.py
         """
-        quantilematcher = re.compile(r"p(\d\d)")
+        quantilematch = re.match(r"p(\d\d)", aggregation)
         supported_aggs = ["mean", "median", "min", "max", "std", "var"]
-        if aggregation not in supported_aggs and not quantilematcher.match(aggregation):
+        if aggregation not in supported_aggs and not quantilematch:
             raise ValueError(
                 "{arg} is not a".format(arg=aggregation)
                 + "supported ensemble aggregation"
             )
 
+        # The aggregation is the same for all keys:
+        if quantilematch:
+            quantile = int(quantilematch.group(1)) / 100.0
+
         # Generate a new empty object:
         vreal = VirtualRealization(self.name + " " + aggregation)
 
@@ -1254,25 +1258,14 @@ class ScratchEnsemble(object):
             # This column should never appear in aggregated data
             del data["REAL"]
 
-            # Look for data we should group by. This would be beneficial
-            # to get from a metadata file, and not by pure guesswork.
-            groupbycolumncandidates = [
-                "DATE",
-                "FIPNUM",
-                "ZONE",
-                "REGION",
-                "JOBINDEX",
-                "Zone",
-                "Region_index",
-            ]
-
             # Pick up string columns (or non-numeric values)
             # (when strings are used as values, this breaks, but it is also
             # meaningless to aggregate them. Most likely, strings in columns
             # is a label we should group over)
             stringcolumns = [x for x in data.columns if data.dtypes[x] == "object"]
 
-            groupby = [x for x in groupbycolumncandidates if x in data.columns]
+            columns = set(data.columns)
+            groupby = [x for x in GROUPBY_CANDIDATES if x in columns]
 
             # Add remainding string columns to columns to group by unless
             # we are working with the STATUS dataframe, which has too many strings..
@@ -1295,9 +1288,8 @@ class ScratchEnsemble(object):
             else:
                 aggobject = data
 
-            if quantilematcher.match(aggregation):
-                quantile = int(quantilematcher.match(aggregation).group(1))
-                aggregated = aggobject.quantile(quantile / 100.0)
+            if quantilematch:
+                aggregated = aggobject.quantile(quantile)
             else:
                 # Passing through the variable 'aggregation' to
                 # Pandas, thus supporting more than we have listed in
@@ -3,15 +3,22 @@ Observations support and related calculations
 """
 
 import os
-import math
+import copy
 import datetime
 from collections import OrderedDict
 import logging
 
 import yaml
+import numpy as np
 import pandas as pd
 import dateutil
 
+try:
+    # Use the libyaml based parser if available
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 from .realization import ScratchRealization
 from .ensemble import ScratchEnsemble
 from .ensembleset import EnsembleSet
@@ -22,6 +29,192 @@ from .virtualensemble import VirtualEnsemble
 
 logger = logging.getLogger(__name__)
 
+# Parsed observation files, keyed by absolute path. Each value is a tuple
+# of modification time, file size and the parsed (uncleaned) dictionary.
+# Least recently used entries are evicted when the cache is full.
+_YAML_CACHE = OrderedDict()
+_YAML_CACHE_MAXSIZE = 100
+
+
+def _load_yaml_cached(filename):
+    """Load a yaml observation file, reusing earlier parse results
+
+    The cache is invalidated for a file if its modification time or
+    size has changed since it was parsed.
+
+    Args:
+        filename (str): Path to yaml file
+
+    Returns:
+        dict with the parsed yaml data. This is a copy, and can be
+        modified freely by the caller.
+    """
+    path = os.path.abspath(filename)
+    stat = os.stat(path)
+    cached = _YAML_CACHE.get(path)
+    if cached is not None and cached[:2] == (stat.st_mtime, stat.st_size):
+        _YAML_CACHE.move_to_end(path)
+        return copy.deepcopy(cached[2])
+    with open(path) as yamlfile:
+        parsed = yaml.load(yamlfile, Loader=SafeLoader)
+    _YAML_CACHE[path] = (stat.st_mtime, stat.st_size, parsed)
+    _YAML_CACHE.move_to_end(path)
+    while len(_YAML_CACHE) > _YAML_CACHE_MAXSIZE:
+        _YAML_CACHE.popitem(last=False)
+    return copy.deepcopy(parsed)
+
+
+# Columns in mismatch frames, in order, for each observation type
+_MISMATCH_COLUMNS = {
+    "txt": (
+        "OBSTYPE",
+        "OBSKEY",
+        "LABEL",
+        "MISMATCH",
+        "L1",
+        "L2",
+        "SIMVALUE",
+        "OBSVALUE",
+        "MEASERROR",
+        "SIGN",
+    ),
+    "scalar": (
+        "OBSTYPE",
+        "OBSKEY",
+        "LABEL",
+        "MISMATCH",
+        "L1",
+        "SIMVALUE",
+        "OBSVALUE",
+        "MEASERROR",
+        "L2",
+        "SIGN",
+    ),
+    "smryh": (
+        "OBSTYPE",
+        "OBSKEY",
+        "LABEL",
+        "MISMATCH",
+        "MEASERROR",
+        "L1",
+        "L2",
+        "TIME_INDEX",
+    ),
+    "smry": (
+        "OBSTYPE",
+        "OBSKEY",
+        "DATE",
+        "MEASERROR",
+        "LABEL",
+        "MISMATCH",
+        "OBSVALUE",
+        "SIMVALUE",
+        "L1",
+        "L2",
+        "SIGN",
+    ),
+}
+
+# Columns computed by _pointwise_mismatch()
+_POINTWISE_COLUMNS = ("MISMATCH", "L1", "L2", "SIGN")
+
+
+def _pointwise_mismatch(mismatch):
+    """Compute mismatch columns for observations of single values
+
+    Args:
+        mismatch (np.ndarray): Signed differences between simulated
+            and observed values, one for each observation.
+
+    Returns:
+        dict with arrays for the columns MISMATCH, L1, L2 and SIGN
+    """
+    # The sign is computed from comparisons and not np.sign(), so that
+    # undefined (NaN) mismatches get a zero sign, as integers.
+    return {
+        "MISMATCH": mismatch,
+        "L1": np.abs(mismatch),
+        "L2": mismatch * mismatch,
+        "SIGN": (mismatch > 0).astype(int) - (mismatch < 0).astype(int),
+    }
+
+
+def _concat_mismatches(mismatches, keys, names):
+    """Concatenate mismatch dataframes from several realizations,
+    labelling the rows from each realization by its key.
+
+    Args:
+        mismatches (list): dataframes from _realization_mismatch()
+        keys (list): One key pr. dataframe, realization indices, or
+            tuples of realization index and ensemble name.
+        names (list): Column names for the keys, e.g. ["REAL"]
+
+    Returns:
+        dataframe with the key columns last
+    """
+    mismatch = pd.concat(mismatches, keys=keys, names=names + [None], sort=False)
+    labels = mismatch.index
+    mismatch.reset_index(drop=True, inplace=True)
+    for name in names:
+        mismatch[name] = labels.get_level_values(name)
+    return mismatch
+
+
+def _object_array(values):
+    """Make a one-dimensional object array from a list
+
+    This is much faster than np.array(values, dtype=object) for lists
+    of datetime.date, which numpy inspects element by element."""
+    array = np.empty(len(values), dtype=object)
+    for idx, value in enumerate(values):
+        array[idx] = value
+    return array
+
+
+def _mismatch_frame(blocks):
+    """Make a mismatch dataframe from column-wise data for
+    each observation type.
+
+    Columns are ordered as they first appear in the blocks, and
+    values missing for an observation type are NaN.
+
+    Args:
+        blocks (list): dicts with equally long columns, lists or
+            numpy arrays, indexed by column name. One dict for each
+            observation type, with rows in the order of the result.
+
+    Returns:
+        pd.DataFrame
+    """
+    if not blocks:
+        return pd.DataFrame()
+    if len(blocks) == 1:
+        columns = dict(blocks[0])
+    else:
+        nrows = [len(next(iter(block.values()))) for block in blocks]
+        colnames = []
+        for block in blocks:
+            colnames.extend(col for col in block if col not in colnames)
+        columns = {}
+        for colname in colnames:
+            parts = [block.get(colname) for block in blocks]
+            if any(isinstance(part, np.ndarray) for part in parts):
+                # Pointwise mismatch columns, kept as numeric arrays
+                columns[colname] = np.concatenate(
+                    [
+                        np.full(length, np.nan) if part is None else np.asarray(part)
+                        for part, length in zip(parts, nrows)
+                    ]
+                )
+            else:
+                values = []
+                for part, length in zip(parts, nrows):
+                    values.extend([np.nan] * length if part is None else part)
+                columns[colname] = values
+    if "DATE" in columns:
+        columns["DATE"] = _object_array(columns["DATE"])
+    return pd.DataFrame(columns)
+
 
 class Observations(object):
     """Represents a set of observations and the ability to
@@ -78,8 +271,7 @@ class Observations(object):
         self.observations = dict()
 
         if isinstance(observations, str):
-            with open(observations) as yamlfile:
-                self.observations = yaml.full_load(yamlfile)
+            self.observations = _load_yaml_cached(observations)
         elif isinstance(observations, dict):
             self.observations = observations
         else:
@@ -118,31 +310,31 @@ class Observations(object):
             logger.info("Evaluating RealizationCombination")
             ens_or_real = ens_or_real.to_virtual()
         if isinstance(ens_or_real, EnsembleSet):
-            mismatches = {}
+            realkeys = []
+            mismatches = []
             # pylint: disable=protected-access
             for ensname, ens in ens_or_real._ensembles.items():
                 logger.info("Calculating mismatch for ensemble %s", ensname)
                 for realidx, real in ens.realizations.items():
                     logger.info("Calculating mismatch for realization %s", str(realidx))
-                    mismatches[(ensname, realidx)] = self._realization_mismatch(real)
-                    mismatches[(ensname, realidx)]["REAL"] = realidx
-                    mismatches[(ensname, realidx)]["ENSEMBLE"] = ensname
-            return pd.concat(mismatches, axis=0, ignore_index=True)
+                    realkeys.append((realidx, ensname))
+                    mismatches.append(self._realization_mismatch(real))
+            return _concat_mismatches(mismatches, realkeys, ["REAL", "ENSEMBLE"])
         if isinstance(ens_or_real, ScratchEnsemble):
-            mismatches = {}
-            for realidx, real in ens_or_real.realizations.items():
-                mismatches[realidx] = self._realization_mismatch(real)
-                mismatches[realidx]["REAL"] = realidx
-            return pd.concat(mismatches, axis=0, ignore_index=True, sort=False)
+            realidxs = list(ens_or_real.realizations.keys())
+            mismatches = [
+                self._realization_mismatch(real)
+                for real in ens_or_real.realizations.values()
+            ]
+            return _concat_mismatches(mismatches, realidxs, ["REAL"])
         if isinstance(ens_or_real, VirtualEnsemble):
             logger.info("Calculating mismatch on ensemble %s", ens_or_real.name)
-            mismatches = {}
-            for realidx in ens_or_real.realindices:
-                mismatches[realidx] = self._realization_mismatch(
-                    ens_or_real.get_realization(realidx)
-                )
-                mismatches[realidx]["REAL"] = realidx
-            return pd.concat(mismatches, axis=0, ignore_index=True, sort=False)
+            realidxs = list(ens_or_real.realindices)
+            mismatches = [
+                self._realization_mismatch(ens_or_real.get_realization(realidx))
+                for realidx in realidxs
+            ]
+            return _concat_mismatches(mismatches, realidxs, ["REAL"])
         if isinstance(ens_or_real, (ScratchRealization, VirtualRealization)):
             return self._realization_mismatch(ens_or_real)
         if isinstance(ens_or_real, EnsembleSet):
@@ -222,6 +414,54 @@ class Observations(object):
         the number of observation units."""
         return self.observations.keys()
 
+    def _get_smryh_data(self, real):
+        """Fetch summary data needed for all smryh observations
+        in one call to get_smry() pr. time_index.
+
+        Args:
+            real : ScratchRealization or VirtualRealization
+
+        Returns:
+            dict with time_index (None if not specified) as keys, and
+            dataframes from get_smry() with the union of all vectors
+            needed for that time_index.
+        """
+        column_keys = {}
+        for obsunit in self.observations.get("smryh", []):
+            time_index = obsunit.get("time_index")
+            if time_index is not None and not isinstance(
+                time_index, (str, datetime.datetime, datetime.date)
+            ):
+                logger.error(
+                    (
+                        "obsunit-timeindex was not string or date object\n"
+                        "Should not be possible, file a bug report"
+                    )
+                )
+                logger.error(time_index)
+                logger.error(type(time_index))
+                continue
+            column_keys.setdefault(time_index, set()).update(
+                [obsunit["key"], obsunit["histvec"]]
+            )
+
+        smryh_data = {}
+        for time_index, keys in column_keys.items():
+            if time_index is None:
+                # (let get_smry() determine the possible time_index)
+                smryh_data[time_index] = real.get_smry(column_keys=sorted(keys))
+            elif isinstance(time_index, str):
+                smryh_data[time_index] = real.get_smry(
+                    time_index=time_index, column_keys=sorted(keys)
+                )
+            else:
+                # real.get_smry only allows strings or
+                # list of datetimes as time_index.
+                smryh_data[time_index] = real.get_smry(
+                    time_index=[time_index], column_keys=sorted(keys)
+                )
+        return smryh_data
+
     def _realization_mismatch(self, real):
         """Compute the mismatch from the current loaded
         observations to a realization.
@@ -251,38 +491,52 @@ class Observations(object):
         """
         # mismatch_df = pd.DataFrame(columns=['OBSTYPE', 'OBSKEY',
         #     'DATE', 'OBSINDEX', 'MISMATCH', 'L1', 'L2', 'SIGN'])
-        mismatches = []
+        # Mismatch data is collected column-wise, one dict of columns for
+        # each observation type, see _MISMATCH_COLUMNS for the order.
+        # For txt, scalar and smry observations, MISMATCH, L1, L2 and SIGN
+        # are computed as arrays for all rows of the type at once from
+        # the signed differences.
+        blocks = []
+        # Data for txt observations is fetched once pr. localpath
+        txt_data = {}
+        smryh_data = self._get_smryh_data(real)
         for obstype in self.observations.keys():
+            if obstype not in _MISMATCH_COLUMNS:
+                continue
+            pointwise = obstype != "smryh"
+            columns = {
+                colname: []
+                for colname in _MISMATCH_COLUMNS[obstype]
+                if not (pointwise and colname in _POINTWISE_COLUMNS)
+            }
+            pointwise_mismatches = []
             for obsunit in self.observations[obstype]:  # (list)
                 if obstype == "txt":
+                    localpath = obsunit["localpath"]
+                    if localpath not in txt_data:
+                        try:
+                            txt_data[localpath] = real.get_df(localpath)
+                        except (KeyError, ValueError):
+                            txt_data[localpath] = None
                     try:
-                        sim_value = real.get_df(obsunit["localpath"])[obsunit["key"]]
-                    except (KeyError, ValueError):
+                        sim_value = txt_data[localpath][obsunit["key"]]
+                    except (KeyError, ValueError, TypeError):
                         logger.warning(
                             "%s in %s not found, ignored",
                             obsunit["key"],
                             obsunit["localpath"],
                         )
                         continue
-                    mismatch = float(sim_value - obsunit["value"])
+                    pointwise_mismatches.append(float(sim_value - obsunit["value"]))
                     measerror = 1
-                    sign = (mismatch > 0) - (mismatch < 0)
-                    mismatches.append(
-                        dict(
-                            OBSTYPE=obstype,
-                            OBSKEY=str(obsunit["localpath"])
-                            + "/"
-                            + str(obsunit["key"]),
-                            LABEL=obsunit.get("label", ""),
-                            MISMATCH=mismatch,
-                            L1=abs(mismatch),
-                            L2=abs(mismatch) ** 2,
-                            SIMVALUE=sim_value,
-                            OBSVALUE=obsunit["value"],
-                            MEASERROR=measerror,
-                            SIGN=sign,
-                        )
+                    columns["OBSTYPE"].append(obstype)
+                    columns["OBSKEY"].append(
+                        str(obsunit["localpath"]) + "/" + str(obsunit["key"])
                     )
+                    columns["LABEL"].append(obsunit.get("label", ""))
+                    columns["SIMVALUE"].append(sim_value)
+                    columns["OBSVALUE"].append(obsunit["value"])
+                    columns["MEASERROR"].append(measerror)
                 if obstype == "scalar":
                     try:
                         sim_value = real.get_df(obsunit["key"])
@@ -291,79 +545,48 @@ class Observations(object):
                             "No data found for scalar: %s, ignored", obsunit["key"]
                         )
                         continue
-                    mismatch = float(sim_value - obsunit["value"])
+                    pointwise_mismatches.append(float(sim_value - obsunit["value"]))
                     measerror = 1
-                    sign = (mismatch > 0) - (mismatch < 0)
-                    mismatches.append(
-                        dict(
-                            OBSTYPE=obstype,
-                            OBSKEY=str(obsunit["key"]),
-                            LABEL=obsunit.get("label", ""),
-                            MISMATCH=mismatch,
-                            L1=abs(mismatch),
-                            SIMVALUE=sim_value,
-                            OBSVALUE=obsunit["value"],
-                            MEASERROR=measerror,
-                            L2=abs(mismatch) ** 2,
-                            SIGN=sign,
-                        )
-                    )
+                    columns["OBSTYPE"].append(obstype)
+                    columns["OBSKEY"].append(str(obsunit["key"]))
+                    columns["LABEL"].append(obsunit.get("label", ""))
+                    columns["SIMVALUE"].append(sim_value)
+                    columns["OBSVALUE"].append(obsunit["value"])
+                    columns["MEASERROR"].append(measerror)
                 if obstype == "smryh":
                     if "time_index" in obsunit:
-                        if isinstance(obsunit["time_index"], str):
-                            sim_hist = real.get_smry(
-                                time_index=obsunit["time_index"],
-                                column_keys=[obsunit["key"], obsunit["histvec"]],
-                            )
-                        elif isinstance(
-                            obsunit["time_index"], (datetime.datetime, datetime.date)
-                        ):
-                            # real.get_smry only allows strings or
-                            # list of datetimes as time_index.
-                            sim_hist = real.get_smry(
-                                time_index=[obsunit["time_index"]],
-                                column_keys=[obsunit["key"], obsunit["histvec"]],
-                            )
-                        else:
-                            logger.error(
-                                (
-                                    "obsunit-timeindex was not string or date object\n"
-                                    "Should not be possible, file a bug report"
-                                )
-                            )
-                            logger.error(obsunit["time_index"])
-                            logger.error(type(obsunit["time_index"]))
                         time_index_str = str(obsunit["time_index"])
                     else:
-                        sim_hist = real.get_smry(
-                            column_keys=[obsunit["key"], obsunit["histvec"]]
-                            # (let get_smry() determine the possible time_index)
-                        )
                         time_index_str = ""
-                    # If empty df returned, we don't have the data for this:
-                    if sim_hist.empty:
+                    sim_hist = smryh_data.get(obsunit.get("time_index"))
+                    # If no data is returned, we don't have the data for this:
+                    if (
+                        sim_hist is None
+                        or sim_hist.empty
+                        or obsunit["key"] not in sim_hist
+                        or obsunit["histvec"] not in sim_hist
+                    ):
                         logger.warning(
                             "No data found for smryh: %s and %s, ignored.",
                             obsunit["key"],
                             obsunit["histvec"],
                         )
                         continue
-                    sim_hist["mismatch"] = (
-                        sim_hist[obsunit["key"]] - sim_hist[obsunit["histvec"]]
-                    )
+                    # Reduce over the time series directly on numpy arrays,
+                    # skipping missing values like Pandas' sum() would.
+                    sim_values = sim_hist[obsunit["key"]].to_numpy(dtype=float)
+                    hist_values = sim_hist[obsunit["histvec"]].to_numpy(dtype=float)
+                    diff = sim_values - hist_values
+                    diff = diff[~np.isnan(diff)]
                     measerror = 1
-                    mismatches.append(
-                        dict(
-                            OBSTYPE="smryh",
-                            OBSKEY=obsunit["key"],
-                            LABEL=obsunit.get("label", ""),
-                            MISMATCH=sim_hist["mismatch"].sum(),
-                            MEASERROR=measerror,
-                            L1=sim_hist["mismatch"].abs().sum(),
-                            L2=math.sqrt((sim_hist["mismatch"] ** 2).sum()),
-                            TIME_INDEX=time_index_str,
-                        )
-                    )
+                    columns["OBSTYPE"].append("smryh")
+                    columns["OBSKEY"].append(obsunit["key"])
+                    columns["LABEL"].append(obsunit.get("label", ""))
+                    columns["MISMATCH"].append(diff.sum())
+                    columns["MEASERROR"].append(measerror)
+                    columns["L1"].append(np.abs(diff).sum())
+                    columns["L2"].append(np.sqrt(np.dot(diff, diff)))
+                    columns["TIME_INDEX"].append(time_index_str)
                 if obstype == "smry":
                     # For 'smry', there is a list of
                     # observations (indexed by date)
@@ -379,24 +602,22 @@ class Observations(object):
                                 str(unit["date"]),
                             )
                             continue
-                        mismatch = float(sim_value - unit["value"])
-                        sign = (mismatch > 0) - (mismatch < 0)
-                        mismatches.append(
-                            dict(
-                                OBSTYPE="smry",
-                                OBSKEY=obsunit["key"],
-                                DATE=unit["date"],
-                                MEASERROR=unit["error"],
-                                LABEL=unit.get("label", ""),
-                                MISMATCH=mismatch,
-                                OBSVALUE=unit["value"],
-                                SIMVALUE=sim_value,
-                                L1=abs(mismatch),
-                                L2=abs(mismatch) ** 2,
-                                SIGN=sign,
-                            )
-                        )
-        return pd.DataFrame(mismatches)
+                        pointwise_mismatches.append(float(sim_value - unit["value"]))
+                        columns["OBSTYPE"].append("smry")
+                        columns["OBSKEY"].append(obsunit["key"])
+                        columns["DATE"].append(unit["date"])
+                        columns["MEASERROR"].append(unit["error"])
+                        columns["LABEL"].append(unit.get("label", ""))
+                        columns["OBSVALUE"].append(unit["value"])
+                        columns["SIMVALUE"].append(sim_value)
+            if not columns["OBSTYPE"]:
+                continue
+            if pointwise:
+                columns.update(_pointwise_mismatch(np.array(pointwise_mismatches)))
+            blocks.append(
+                {colname: columns[colname] for colname in _MISMATCH_COLUMNS[obstype]}
+            )
+        return _mismatch_frame(blocks)
 
     def _realization_misfit(self, real, defaulterrors=False, corr=None):
         """The misfit value for the observation set
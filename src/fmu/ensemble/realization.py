@@ -695,7 +695,7 @@ class ScratchRealization(object):
         fullpath = shortcut2path(self.keys(), localpath)
         if fullpath not in self.data.keys():
             raise KeyError("Could not find {}".format(localpath))
-        data = self.data[shortcut2path(self.keys(), localpath)]
+        data = self.data[fullpath]
         if not isinstance(merge, list):
             merge = [merge]  # can still be None
         if merge and merge[0] is not None:
@@ -2,9 +2,26 @@
 
 
 import os
+import re
+import fnmatch
+from collections import Counter
 from collections.abc import MutableMapping
 
 
+# Columns that aggregations will group by, if present in the data. This
+# would be beneficial to get from a metadata file, and not by pure
+# guesswork. The order here determines the order of the groupby.
+GROUPBY_CANDIDATES = (
+    "DATE",
+    "FIPNUM",
+    "ZONE",
+    "REGION",
+    "JOBINDEX",
+    "Zone",
+    "Region_index",
+)
+
+
 def flatten(dictionary, parent_key="", sep="_"):
     """Flatten nested dictionaries by introducing new keys
     with the accumulated path.
@@ -92,19 +109,84 @@ def shortcut2path(keys, shortpath):
         input untouched if nothing is found, or of the shortpath is
         already fully qualified.
     """
+    # The alias kinds are tried in the same order as in shortcut_index(),
+    # returning early, as building the full index is wasted on a single
+    # lookup.
+    keys = list(keys)
     basenames = list(map(os.path.basename, keys))
     if basenames.count(shortpath) == 1:
-        short2path = {os.path.basename(x): x for x in keys}
-        return short2path[shortpath]
+        return keys[basenames.index(shortpath)]
     noexts = ["".join(x.split(".")[:-1]) for x in keys]
     if noexts.count(shortpath) == 1:
-        short2path = {"".join(x.split(".")[:-1]): x for x in keys}
-        return short2path[shortpath]
-    basenamenoexts = ["".join(os.path.basename(x).split(".")[:-1]) for x in keys]
+        return keys[noexts.index(shortpath)]
+    basenamenoexts = ["".join(basename.split(".")[:-1]) for basename in basenames]
     if basenamenoexts.count(shortpath) == 1:
-        short2path = {"".join(os.path.basename(x).split(".")[:-1]): x for x in keys}
-        return short2path[shortpath]
+        return keys[basenamenoexts.index(shortpath)]
     # If we get here, we did not find anything that
     # this shorthand could point to. Return as is, and let the
     # calling function handle further errors.
     return shortpath
+
+
+def shortcut_index(keys):
+    """
+    Build a lookup table from all unambiguous short pathnames to
+    fully qualified pathnames, as used by shortcut2path().
+
+    Use this instead of shortcut2path() when many lookups are to
+    be made into the same set of keys.
+
+    A shortcut is looked up first among the basenames of the keys, then
+    among the keys without file extension, and last among the basenames
+    without file extension. The first of these where the shortcut is
+    unique decides which key it points to.
+
+    Args:
+        keys (list of str): List if all keys in the internal datastore
+
+    Returns:
+        dict with short pathnames as keys and fully qualified
+        pathnames as values.
+    """
+    basenames = []
+    noexts = []
+    basenamenoexts = []
+    for key in keys:
+        basename = os.path.basename(key)
+        basenames.append(basename)
+        # Note: Any dots but the last are removed, not only the extension
+        noexts.append("".join(key.split(".")[:-1]))
+        basenamenoexts.append("".join(basename.split(".")[:-1]))
+    index = {}
+    for aliases in (basenames, noexts, basenamenoexts):
+        counts = Counter(aliases)
+        for alias, key in zip(aliases, keys):
+            if counts[alias] == 1:
+                index.setdefault(alias, key)
+    return index
+
+
+def fnmatch_any(names, patterns):
+    """Filter a list of names on a list of wildcard patterns
+
+    All patterns are compiled into one regular expression, so that
+    every name is only matched once.
+
+    Args:
+        names (iterable of str): Names to be filtered, typically
+            summary vector names or dataframe columns.
+        patterns (list of str): Wildcard patterns as understood by
+            fnmatch, like ['F*PR', 'WOPT:*']
+
+    Returns:
+        list of names matching at least one of the patterns, in their
+        original order.
+    """
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    if not patterns:
+        return []
+    matcher = re.compile(
+        "|".join("(?:" + fnmatch.translate(pattern) + ")" for pattern in patterns)
+    ).match
+    return [name for name in names if matcher(name)]
@@ -4,10 +4,10 @@
 import os
 import re
 import shutil
-import fnmatch
 import datetime
 import warnings
 import logging
+from collections import OrderedDict
 
 import yaml
 import numpy as np
@@ -15,6 +15,7 @@ import pandas as pd
 
 from .virtualrealization import VirtualRealization
 from .ensemblecombination import EnsembleCombination
+from .util import GROUPBY_CANDIDATES, fnmatch_any, shortcut2path, shortcut_index
 
 try:
     import pyarrow
@@ -25,6 +26,69 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Maximal number of column matches from get_smry() to remember
+_SMRY_COLUMNS_CACHE_MAXSIZE = 32
+
+
+def _date_statistics(dframe, quantiles):
+    """Compute mean, minimum, maximum and quantiles pr. date for
+    every numerical column in a dataframe.
+
+    Each column is sorted once by date and value, after which all
+    statistics are picked directly from the sorted values. Missing
+    values are ignored. Quantiles are linearly interpolated, as in
+    Pandas and numpy.
+
+    Args:
+        dframe (pd.DataFrame): Data with a DATE column
+        quantiles (dict): Quantile values between 0 and 1, with
+            the names to use in the returned dict as keys.
+
+    Returns:
+        dict of dataframes, with keys "mean", "minimum", "maximum" and the
+        quantile names. Each dataframe is indexed by the sorted dates, with
+        one column pr. numerical column in the input.
+    """
+    codes, dates = pd.factorize(dframe["DATE"], sort=True)
+    columns = [
+        col for col in dframe.select_dtypes(include="number").columns if col != "DATE"
+    ]
+    stats = {
+        name: np.full((len(dates), len(columns)), np.nan)
+        for name in ["mean", "minimum", "maximum"] + list(quantiles)
+    }
+    for colidx, column in enumerate(columns):
+        values = dframe[column].to_numpy(dtype=float)
+        valid = (codes >= 0) & ~np.isnan(values)
+        groups, values = codes[valid], values[valid]
+        order = np.lexsort((values, groups))
+        groups, values = groups[order], values[order]
+
+        counts = np.bincount(groups, minlength=len(dates))
+        nonempty = counts > 0
+        if not nonempty.any():
+            continue
+        starts = (np.cumsum(counts) - counts)[nonempty]
+        counts = counts[nonempty]
+        ends = starts + counts - 1
+
+        stats["minimum"][nonempty, colidx] = values[starts]
+        stats["maximum"][nonempty, colidx] = values[ends]
+        stats["mean"][nonempty, colidx] = np.add.reduceat(values, starts) / counts
+        for name, quantile in quantiles.items():
+            position = (counts - 1) * quantile
+            offset = np.floor(position).astype(int)
+            fraction = position - offset
+            lower = values[starts + offset]
+            upper = values[np.minimum(starts + offset + 1, ends)]
+            stats[name][nonempty, colidx] = lower + (upper - lower) * fraction
+
+    dateindex = pd.Index(dates, name="DATE")
+    return {
+        name: pd.DataFrame(data, index=dateindex, columns=columns)
+        for name, data in stats.items()
+    }
+
 
 class VirtualEnsemble(object):
     """A computed or archived ensemble
@@ -93,6 +157,23 @@ class VirtualEnsemble(object):
         # overlap of keys in self.data and self.lazy_frames.
         self.lazy_frames = {}
 
+        # Lookup table from shortcuts to fully qualified localpaths,
+        # valid for the list of keys it was built from.
+        self._shortcut_index = None
+        self._shortcut_index_keys = None
+
+        # Row positions for each realization index in each dataframe,
+        # stored together with the dataframe and its length at the time
+        # they were computed. Entries are dropped when data is replaced
+        # or removed through the methods of this class.
+        self._real_positions = {}
+
+        # Positions of the summary columns matched by column_keys in
+        # get_smry(), indexed by the summary frame name and the sorted
+        # column_keys. Each value holds the columns object the matching
+        # was done on, for validation, and the column positions.
+        self._smry_columns = OrderedDict()
+
         if fromdisk:
             self.from_disk(fromdisk, lazy_load=lazy_load)
 
@@ -159,12 +240,36 @@ class VirtualEnsemble(object):
         of ambiguity, the shortpath will be returned.
 
         """
-        # pylint: disable=import-outside-toplevel
-        from .ensemble import shortcut2path
+        if keys is not None:
+            return shortcut2path(keys, shortpath)
+        return self._get_shortcut_index().get(shortpath, shortpath)
+
+    def _get_shortcut_index(self):
+        """Return a dictionary from shortcuts to fully qualified
+        localpaths for the current keys.
+
+        The dictionary is rebuilt only when the set of keys has changed
+        since the last call. Shortcuts are resolved in the same order of
+        preference as in shortcut2path(), and ambiguous shortcuts
+        are not included.
+        """
+        keys = self.keys()
+        if self._shortcut_index is not None and keys == self._shortcut_index_keys:
+            return self._shortcut_index
+
+        inconsistent_lazy_frames = set(self.data.keys()).intersection(
+            set(self.lazy_frames.keys())
+        )
+        if inconsistent_lazy_frames:
+            # See comments in __init__ on lazy frames.
+            logger.critical(
+                "Internal error, inconsistent lazy frames:\n %s",
+                str(inconsistent_lazy_frames),
+            )
 
-        if keys is None:
-            return shortcut2path(self.keys(), shortpath)
-        return shortcut2path(keys, shortpath)
+        self._shortcut_index = shortcut_index(keys)
+        self._shortcut_index_keys = keys
+        return self._shortcut_index
 
     def __getitem__(self, localpath):
         """Shorthand for .get_df()
@@ -190,12 +295,18 @@ class VirtualEnsemble(object):
         vreal = VirtualRealization(
             description="Realization %d from %s" % (realindex, self._name)
         )
+        # Forget row positions for dataframes that have been removed:
+        for key in list(self._real_positions):
+            if key not in self.data:
+                del self._real_positions[key]
         for key in self.data.keys():
-            data = self.get_df(key)
-            if key != "__smry_metadata":
+            if key == "__smry_metadata":
                 # Special treatment of the internal special frame
-                # that is constant over all realizations
-                realizationdata = data[data["REAL"] == realindex]
+                # that is constant over all realizations, added below.
+                continue
+            data = self.get_df(key)
+            positions = self._get_real_positions(key, data).get(realindex, [])
+            realizationdata = data.iloc[positions]
             if len(realizationdata) == 1:
                 # Convert scalar values to dictionaries, avoiding
                 # getting length-one-series returned later on access.
@@ -214,6 +325,30 @@ class VirtualEnsemble(object):
             return vreal
         raise ValueError("No data for realization %d" % realindex)
 
+    def _get_real_positions(self, key, data):
+        """Return the row positions for every realization in a dataframe
+
+        This is computed in one pass for all realizations, and reused
+        as long as the same dataframe object with the same length is
+        stored under key. Only this cheap check is done, so callers
+        who modify a dataframe from get_df() in place, e.g. by sorting
+        it, must store it again with append(key, dataframe,
+        overwrite=True).
+
+        Args:
+            key: fully qualified localpath for the dataframe
+            data: the dataframe stored under key
+
+        Returns:
+            dict with realization indices as keys and arrays of
+            row positions as values.
+        """
+        cached = self._real_positions.get(key)
+        if cached is None or cached[0] is not data or cached[1] != len(data):
+            cached = (data, len(data), data.groupby("REAL").indices)
+            self._real_positions[key] = cached
+        return cached[2]
+
     def add_realization(self, realization, realidx=None, overwrite=False):
         """Add a realization. A ScratchRealization will be effectively
         converted to a virtual realization.
@@ -259,6 +394,7 @@ class VirtualEnsemble(object):
                 self.data[key] = self.data[key].append(
                     dframe, ignore_index=True, sort=True
                 )
+            self._real_positions.pop(key, None)
         self.update_realindices()
 
     def remove_realizations(self, deleteindices):
@@ -284,11 +420,14 @@ class VirtualEnsemble(object):
         # Trigger load of any lazy frames:
         for key in list(self.lazy_frames.keys()):
             self.get_df(key)
-        # There might be Pandas tricks to avoid this outer loop.
-        for realindex in indicestodelete:
-            for key in self.data:
-                if key != "__smry_metadata":
-                    self.data[key] = self.data[key][self.data[key]["REAL"] != realindex]
+        for key in self.data:
+            if key != "__smry_metadata" and indicestodelete:
+                keep = np.isin(
+                    self.data[key]["REAL"].to_numpy(), indicestodelete, invert=True
+                )
+                self.data[key] = self.data[key][keep]
+        self._real_positions.clear()
+        self._smry_columns.clear()
         self.update_realindices()
         logger.info(
             "Removed %s realization(s) from VirtualEnsemble", len(indicestodelete)
@@ -306,6 +445,8 @@ class VirtualEnsemble(object):
         for localpath in localpaths:
             if localpath in self.data:
                 del self.data[localpath]
+                self._real_positions.pop(localpath, None)
+                self._smry_columns.clear()
                 logger.info("Deleted %s from ensemble", localpath)
             elif localpath in self.lazy_frames:
                 del self.lazy_frames[localpath]
@@ -333,14 +474,18 @@ class VirtualEnsemble(object):
 
         WARNING: CODE DUPLICATION from ensemble.py
         """
-        quantilematcher = re.compile(r"p(\d\d)")
+        quantilematch = re.match(r"p(\d\d)", aggregation)
         supported_aggs = ["mean", "median", "min", "max", "std", "var"]
-        if aggregation not in supported_aggs and not quantilematcher.match(aggregation):
+        if aggregation not in supported_aggs and not quantilematch:
             raise ValueError(
                 "{arg} is not a".format(arg=aggregation)
                 + "supported ensemble aggregation"
             )
 
+        # The aggregation is the same for all keys:
+        if quantilematch:
+            quantile = int(quantilematch.group(1)) / 100.0
+
         # Generate a new empty object:
         vreal = VirtualRealization(self._name + " " + aggregation)
 
@@ -367,25 +512,16 @@ class VirtualEnsemble(object):
             key = self.shortcut2path(key)
             if key == "__smry_metadata":
                 continue
-            data = self.get_df(key).drop(columns="REAL")
-
-            # Look for data we should group by. This would be beneficial
-            # to get from a metadata file, and not by pure guesswork.
-            groupbycolumncandidates = [
-                "DATE",
-                "FIPNUM",
-                "ZONE",
-                "REGION",
-                "JOBINDEX",
-                "Zone",
-                "Region_index",
-            ]
-
-            groupby = [x for x in groupbycolumncandidates if x in data.columns]
-
-            # Filter to only numerical columns and groupby columns:
+            data = self.get_df(key)
+
+            columns = set(data.columns)
+            groupby = [x for x in GROUPBY_CANDIDATES if x in columns]
+
+            # Filter to only numerical columns and groupby columns. REAL
+            # is left out here, so that only one copy of the data is made:
             numerical_and_groupby_cols = list(
                 set(list(groupby) + list(data.select_dtypes(include="number").columns))
+                - {"REAL"}
             )
             data = data[numerical_and_groupby_cols]
 
@@ -398,9 +534,8 @@ class VirtualEnsemble(object):
             else:
                 aggobject = data
 
-            if quantilematcher.match(aggregation):
-                quantile = int(quantilematcher.match(aggregation).group(1))
-                aggregated = aggobject.quantile(q=quantile / 100.0)
+            if quantilematch:
+                aggregated = aggobject.quantile(q=quantile)
             else:
                 # Passing through the variable 'aggregation' to
                 # Pandas, thus supporting more than we have listed in
@@ -427,6 +562,8 @@ class VirtualEnsemble(object):
             overwrite: boolean - set to True if existing data is
                 to be overwritten. Defaults to false which will
                 only issue a warning if the dataset exists already.
+                Also needed after modifying a dataframe from get_df()
+                in place, so that cached row positions are recomputed.
         """
         if not isinstance(dataframe, pd.DataFrame):
             raise ValueError("Can only append dataframes")
@@ -436,6 +573,8 @@ class VirtualEnsemble(object):
             logger.warning("Ignoring %s data already exists", key)
             return
         self.data[key] = dataframe
+        self._real_positions.pop(key, None)
+        self._smry_columns.clear()
 
     def to_disk(
         self,
@@ -774,17 +913,10 @@ file is picked up"""
         Raises:
             KeyError if no data is found
         """
-        inconsistent_lazy_frames = set(self.data.keys()).intersection(
-            set(self.lazy_frames.keys())
-        )
-        if inconsistent_lazy_frames:
-            # See comments in __init__ on lazy frames.
-            logger.critical(
-                "Internal error, inconsistent lazy frames:\n %s",
-                str(inconsistent_lazy_frames),
-            )
-        allfullpaths = list(self.data.keys()) + list(self.lazy_frames.keys())
-        fullpath = self.shortcut2path(localpath, keys=allfullpaths)
+        if localpath in self.data:
+            fullpath = localpath
+        else:
+            fullpath = self.shortcut2path(localpath)
         if fullpath not in self.data.keys():
             # Need to lazy load it:
             logger.warning("Loading %s from disk, was lazy", fullpath)
@@ -863,12 +995,18 @@ file is picked up"""
 
         smry_path = "unsmry--" + chosen_smry
         smry = self.get_df(smry_path)
+        positions = self._get_real_positions(smry_path, smry)
+
+        # Only pass on the columns that can match column_keys:
+        colpositions = self._get_smry_columns(smry_path, smry, column_keys)
+
         smry_interpolated = []
         for realidx in smry["REAL"].unique():
             logger.info("Creating VirtualRealization index %s", str(realidx))
             vreal = VirtualRealization(str(realidx))
-            # Inject the summary data for that specific realization
-            vreal.append(smry_path, smry[smry["REAL"] == realidx])
+            # Inject the summary data for that specific realization,
+            # slicing rows and columns in one copy:
+            vreal.append(smry_path, smry.iloc[positions[realidx], colpositions])
 
             # Now ask the VirtualRealization to do interpolation
             interp = vreal.get_smry(column_keys=column_keys, time_index=time_index)
@@ -881,6 +1019,44 @@ file is picked up"""
             smry_interpolated.append(interp)
         return pd.concat(smry_interpolated, ignore_index=True, sort=False)
 
+    def _get_smry_columns(self, smry_path, smry, column_keys):
+        """Return the positions of the columns in a summary dataframe
+        that are needed for get_smry() with the given column_keys.
+
+        The wildcard matching is remembered, and reused as long as
+        the dataframe has the same columns object. Any change to the
+        columns of a dataframe, also in place, replaces that object.
+
+        Args:
+            smry_path: localpath for the summary dataframe
+            smry: the summary dataframe stored under smry_path
+            column_keys: str or list of str, possibly with wildcards,
+                empty or None meaning all columns.
+
+        Returns:
+            list of int, positions in the dataframe of the matching
+            columns together with DATE and REAL, in increasing order.
+        """
+        if not column_keys:
+            column_keys = ["*"]
+        elif isinstance(column_keys, str):
+            column_keys = [column_keys]
+        cache_key = (smry_path, tuple(sorted(column_keys)))
+        cached = self._smry_columns.get(cache_key)
+        if cached is not None and cached[0] is smry.columns:
+            self._smry_columns.move_to_end(cache_key)
+            return cached[1]
+        matches = set(fnmatch_any(list(smry.columns), list(column_keys)))
+        colpositions = [
+            pos
+            for pos, col in enumerate(smry.columns)
+            if col in matches or col in ("DATE", "REAL")
+        ]
+        self._smry_columns[cache_key] = (smry.columns, colpositions)
+        while len(self._smry_columns) > _SMRY_COLUMNS_CACHE_MAXSIZE:
+            self._smry_columns.popitem(last=False)
+        return colpositions
+
     def get_smry_stats(self, column_keys=None, time_index="monthly", quantiles=None):
         """
         Function to extract the ensemble statistics (Mean, Min, Max, P10, P90)
@@ -926,20 +1102,22 @@ file is picked up"""
         # Obtain an aggregated dataframe for only the needed columns over
         # the entire ensemble. This will fail if we don't have the
         # time frequency already internalized.
-        dframe = (
-            self.get_smry(time_index=time_index, column_keys=column_keys)
-            .drop(columns="REAL")
-            .groupby("DATE")
+        dframe = self.get_smry(time_index=time_index, column_keys=column_keys).drop(
+            columns="REAL"
         )
 
+        quantile_values = {
+            "p" + str(quantile): 1 - quantile / 100.0 for quantile in quantiles
+        }
+        stats = _date_statistics(dframe, quantile_values)
+
         # Build a dictionary of dataframes to be concatenated
         dframes = {}
-        dframes["mean"] = dframe.mean()
-        for quantile in quantiles:
-            quantile_str = "p" + str(quantile)
-            dframes[quantile_str] = dframe.quantile(q=1 - quantile / 100.0)
-        dframes["maximum"] = dframe.max()
-        dframes["minimum"] = dframe.min()
+        dframes["mean"] = stats["mean"]
+        for quantile_str in quantile_values:
+            dframes[quantile_str] = stats[quantile_str]
+        dframes["maximum"] = stats["maximum"]
+        dframes["minimum"] = stats["minimum"]
 
         return pd.concat(dframes, names=["STATISTIC"], sort=False)
 
@@ -1021,11 +1199,7 @@ file is picked up"""
             column_keys = [column_keys]
 
         available_smrynames = self.get_df("__smry_metadata")["SMRYCOLUMN"].values
-        matches = set()
-        for key in column_keys:
-            matches = matches.union(
-                [name for name in available_smrynames if fnmatch.fnmatch(name, key)]
-            )
+        matches = set(fnmatch_any(available_smrynames, column_keys))
         # The .replace() in the chain below is to convert NaN's to None, to
         # mimic the dataframes before they are exported to disk.
         return (
@@ -1,6 +1,5 @@
 """Contains the VirtualRealization class"""
 import os
-import fnmatch
 import shutil
 import warnings
 import logging
@@ -9,7 +8,7 @@ import pandas as pd
 import numpy as np
 
 from .realizationcombination import RealizationCombination
-from .util import shortcut2path
+from .util import shortcut2path, fnmatch_any
 from .util.rates import compute_volumetric_rates
 from .util.dates import date_range
 
@@ -471,11 +470,7 @@ class VirtualRealization(object):
             column_keys = [column_keys]
 
         available_smrynames = self.get_df("__smry_metadata")["SMRYCOLUMN"].values
-        matches = set()
-        for key in column_keys:
-            matches = matches.union(
-                [name for name in available_smrynames if fnmatch.fnmatch(name, key)]
-            )
+        matches = set(fnmatch_any(available_smrynames, column_keys))
         return (
             self.get_df("__smry_metadata")
             .set_index("SMRYCOLUMN")
@@ -518,11 +513,7 @@ class VirtualRealization(object):
         for smry in available_smry:
             available_keys = available_keys.union(self.get_df(smry).columns)
 
-        matches = set()
-        for key in column_keys:
-            matches = matches.union(
-                [x for x in available_keys if fnmatch.fnmatch(x, key)]
-            )
+        matches = set(fnmatch_any(available_keys, column_keys))
         if "DATE" in matches:
             matches.remove("DATE")
         return list(matches)
@@ -12,6 +12,7 @@ import dateutil
 import pytest
 
 from fmu.ensemble import Observations, ScratchRealization, ScratchEnsemble, EnsembleSet
+from fmu.ensemble.observations import _mismatch_frame, _pointwise_mismatch
 
 logger = logging.getLogger(__name__)
 
@@ -44,6 +45,91 @@ def test_observation_import(tmpdir):
     assert os.path.exists(exportedfile)
 
 
+def test_observation_import_cache(tmpdir):
+    """Test that repeated loads of a yaml file are independent
+    and pick up changes on disk"""
+    tmpdir.chdir()
+    obsfile = "observations.yml"
+    with open(obsfile, "w") as fhandle:
+        fhandle.write(yaml.dump({"scalar": [{"key": "npv.txt", "value": 3400}]}))
+    obs = Observations(obsfile)
+    assert obs["scalar"][0]["value"] == 3400
+
+    # Modifying one object must not leak into the next:
+    obs["scalar"].pop()
+    assert len(Observations(obsfile)["scalar"]) == 1
+
+    # A rewritten file with a different size must be reparsed:
+    with open(obsfile, "w") as fhandle:
+        fhandle.write(
+            yaml.dump(
+                {
+                    "scalar": [
+                        {"key": "npv.txt", "value": 3400},
+                        {"key": "foo", "value": 1},
+                    ]
+                }
+            )
+        )
+    assert len(Observations(obsfile)["scalar"]) == 2
+
+
+def test_pointwise_mismatch():
+    """Test the mismatch computation for single value observations"""
+    columns = _pointwise_mismatch(np.array([-2.0, 0.0, 3.0, np.nan]))
+    assert list(columns["L1"][:3]) == [2.0, 0.0, 3.0]
+    assert list(columns["L2"][:3]) == [4.0, 0.0, 9.0]
+    assert list(columns["SIGN"]) == [-1, 0, 1, 0]
+    assert columns["SIGN"].dtype == int
+    assert np.isnan(columns["L1"][3])
+    assert np.isnan(columns["L2"][3])
+
+
+def test_mismatch_frame():
+    """Test assembly of mismatch data from several observation types"""
+    assert _mismatch_frame([]).empty
+
+    smryh = {
+        "OBSTYPE": ["smryh"],
+        "OBSKEY": ["FOPT"],
+        "LABEL": [""],
+        "MISMATCH": [2.0],
+        "MEASERROR": [1],
+        "L1": [2.0],
+        "L2": [2.0],
+        "TIME_INDEX": [""],
+    }
+    scalar = {
+        "OBSTYPE": ["scalar"],
+        "OBSKEY": ["npv.txt"],
+        "LABEL": [""],
+        "SIMVALUE": [10],
+        "OBSVALUE": [13],
+        "MEASERROR": [1],
+    }
+    scalar.update(_pointwise_mismatch(np.array([-3.0])))
+    mismatch = _mismatch_frame([smryh, scalar])
+    assert list(mismatch.columns) == [
+        "OBSTYPE",
+        "OBSKEY",
+        "LABEL",
+        "MISMATCH",
+        "MEASERROR",
+        "L1",
+        "L2",
+        "TIME_INDEX",
+        "SIMVALUE",
+        "OBSVALUE",
+        "SIGN",
+    ]
+    assert list(mismatch["MISMATCH"]) == [2.0, -3.0]
+    assert list(mismatch["L2"]) == [2.0, 9.0]
+    assert np.isnan(mismatch["SIGN"][0])
+    assert mismatch["SIGN"][1] == -1
+    assert np.isnan(mismatch["SIMVALUE"][0])
+    assert mismatch["SIMVALUE"][1] == 10
+
+
 def test_real_mismatch():
     """Test calculation of mismatch from the observation set to a
     realization"""
@@ -127,6 +213,20 @@ def test_real_mismatch():
     mis_mis = obs4.mismatch(real)
     assert mis_mis.empty
 
+    # Missing data for one smryh unit should not affect the others:
+    obs5 = Observations(
+        {
+            "smryh": [
+                {"key": "FOPT", "histvec": "FOPTH"},
+                {"key": "FOOBAR", "histvec": "FOOBARH"},
+                {"key": "FWPT", "histvec": "FWPTH", "time_index": "yearly"},
+            ]
+        }
+    )
+    partial_mis = obs5.mismatch(real)
+    assert list(partial_mis["OBSKEY"]) == ["FOPT", "FWPT"]
+    assert partial_mis.loc[0, "L1"] == fopt_mis.loc[0, "L1"]
+
     # This test fails, the consistency check is not implemented.
     # obs_bogus = Observations({'smryh': [{'keddy': 'FOOBAR',
     #                               'histdddvec': 'FOOBARH'}]})
@@ -561,6 +661,9 @@ def test_ensset_mismatch():
     mismatch = obs.mismatch(ensset)
     assert "ENSEMBLE" in mismatch.columns
     assert "REAL" in mismatch.columns
+    assert list(mismatch.columns[-2:]) == ["REAL", "ENSEMBLE"]
+    assert mismatch["REAL"].dtype == np.int64
+    assert list(mismatch.index) == list(range(10))
     assert len(mismatch) == 10
     assert (
         mismatch[mismatch.ENSEMBLE == "iter-0"].L1.sum()
@@ -6,7 +6,13 @@ import numpy as np
 
 import pytest
 
-from fmu.ensemble.util import flatten, parse_number, shortcut2path
+from fmu.ensemble.util import (
+    flatten,
+    parse_number,
+    shortcut2path,
+    shortcut_index,
+    fnmatch_any,
+)
 from fmu.ensemble.util.dates import normalize_dates
 from fmu.ensemble.util.rates import cumcolumn_to_ratecolumn
 
@@ -87,3 +93,37 @@ def test_shortcut2path():
     assert shortcut2path([], "foo") == "foo"
     assert shortcut2path(["bar"], "foo") == "foo"
     assert shortcut2path(["foo1/bar/ambig", "foo2/bar/ambig"], "ambig") == "ambig"
+    assert shortcut2path(["foo1/com.csv", "foo2/com.txt"], "com") == "com"
+    assert shortcut2path(["foo1/com.csv", "foo2/com.txt"], "foo1/com") == "foo1/com.csv"
+
+
+def test_shortcut_index():
+    """Test the lookup table for shortcuts"""
+    keys = [
+        "share/results/tables/unsmry--yearly.csv",
+        "share/results/volumes/simulator_volume_fipnum.csv",
+        "share/results/volumes/simulator_volume_fipnum.txt",
+        "parameters.txt",
+    ]
+    index = shortcut_index(keys)
+    assert index["unsmry--yearly"] == keys[0]
+    assert index["unsmry--yearly.csv"] == keys[0]
+    assert index["share/results/tables/unsmry--yearly"] == keys[0]
+    assert index["simulator_volume_fipnum.txt"] == keys[2]
+    assert "simulator_volume_fipnum" not in index
+    assert index["parameters.txt"] == keys[3]
+    assert index["parameters"] == keys[3]
+    for shortpath in list(index) + ["simulator_volume_fipnum", "bogus"]:
+        assert shortcut2path(keys, shortpath) == index.get(shortpath, shortpath)
+    assert not shortcut_index([])
+
+
+def test_fnmatch_any():
+    """Test filtering of names on multiple wildcards"""
+    names = ["FOPT", "FOPR", "FGPT", "WOPT:OP_1", "DATE"]
+    assert fnmatch_any(names, ["F*PT"]) == ["FOPT", "FGPT"]
+    assert fnmatch_any(names, ["FOP*", "W*"]) == ["FOPT", "FOPR", "WOPT:OP_1"]
+    assert fnmatch_any(names, "FOPT") == ["FOPT"]
+    assert fnmatch_any(names, ["FOP"]) == []
+    assert fnmatch_any(names, []) == []
+    assert fnmatch_any(names, ["*"]) == names
@@ -8,6 +8,7 @@ import pandas as pd
 import pytest
 
 from fmu.ensemble import ScratchEnsemble, VirtualEnsemble
+from fmu.ensemble.virtualensemble import _date_statistics
 
 try:
     # pylint: disable=unused-import
@@ -82,6 +83,15 @@ def test_virtualensemble():
         == "share/results/tables/unsmry--yearly.csv"
     )
 
+    # Shortcuts must follow changes in the datastore:
+    vens.append("copy/unsmry--yearly.csv", vens["unsmry--yearly"])
+    assert vens.shortcut2path("unsmry--yearly") == "unsmry--yearly"
+    vens.remove_data("copy/unsmry--yearly.csv")
+    assert (
+        vens.shortcut2path("unsmry--yearly")
+        == "share/results/tables/unsmry--yearly.csv"
+    )
+
     assert "npv.txt" in vens.keys()
     assert len(vens["npv.txt"]) == 5  # includes the 'error!' string in real4
     assert "outputs.txt" in vens.keys()
@@ -157,6 +167,11 @@ def test_virtualensemble():
     vens.remove_realizations(3)
     assert len(vens.parameters["REAL"].unique()) == 4
     assert len(vens) == 4
+    with pytest.raises(ValueError):
+        vens.get_realization(3)
+    assert len(vens.get_realization(2).get_df("unsmry--yearly")) == len(
+        vreal.get_df("unsmry--yearly")
+    )
     vens.remove_realizations(3)  # This will give warning
     assert len(vens.parameters["REAL"].unique()) == 4
     assert len(vens["unsmry--yearly"]["REAL"].unique()) == 4
@@ -187,6 +202,13 @@ def test_virtualensemble():
     assert vens.get_realization(2).get_df("betterdata")["NPV"] == 1500
     assert vens.get_realization(80).get_df("betterdata")["NPV"] == 9
 
+    # In-place modifications of the data must be stored again:
+    betterdata = vens.get_df("betterdata")
+    betterdata.sort_values("NPV", inplace=True)
+    vens.append("betterdata", betterdata, overwrite=True)
+    assert vens.get_realization(3).get_df("betterdata")["NPV"] == 2300
+    assert vens.get_realization(80).get_df("betterdata")["NPV"] == 9
+
     with pytest.raises(ValueError):
         vens.get_realization(9999)
 
@@ -493,6 +515,45 @@ def test_get_smry_interpolation():
     assert len(daily["FOPR"].unique()) < 4 * 5  # Must be less than the numbers
 
 
+def test_get_smry_columns():
+    """Test that repeated calls to get_smry() are consistent, and
+    that changes to the underlying data are picked up"""
+
+    if "__file__" in globals():
+        # Easen up copying test code into interactive sessions
+        testdir = os.path.dirname(os.path.abspath(__file__))
+    else:
+        testdir = os.path.abspath(".")
+
+    reekensemble = ScratchEnsemble(
+        "reektest", testdir + "/data/testensemble-reek001/" + "realization-*/iter-0"
+    )
+    reekensemble.load_smry(time_index="yearly", column_keys=["F*"])
+    vens = reekensemble.to_virtual()
+
+    monthly = vens.get_smry(column_keys=["FOPT"], time_index="monthly")
+    assert set(monthly.columns) == {"DATE", "REAL", "FOPT"}
+    assert vens.get_smry(column_keys=["FOPT"], time_index="monthly").equals(monthly)
+    assert vens.get_smry(column_keys={"FOPT"}, time_index="monthly").equals(monthly)
+    assert set(vens.get_smry(column_keys="FOP*").columns) > set(monthly.columns)
+
+    # In-place modifications of the data are picked up:
+    fopt_sum = vens.get_smry(column_keys=["FOPT"], time_index="yearly")["FOPT"].sum()
+    vens.get_df("unsmry--yearly")["FOPT"] *= 2
+    assert vens.get_smry(column_keys=["FOPT"], time_index="yearly")[
+        "FOPT"
+    ].sum() == pytest.approx(2 * fopt_sum)
+    vens.get_df("unsmry--yearly")["FOPTX"] = 1
+    assert "FOPTX" in vens.get_smry(column_keys=["FOPT*"], time_index="yearly")
+
+    # Replacing the summary data in the virtual ensemble is picked up:
+    smry = vens.get_df("unsmry--yearly")
+    vens.append("unsmry--yearly", smry[smry["REAL"] != 0], overwrite=True)
+    monthly = vens.get_smry(column_keys=["FOPT"], time_index="monthly")
+    assert 0 not in monthly["REAL"].unique()
+    assert len(monthly["REAL"].unique()) == 4
+
+
 def test_volumetric_rates():
     """Test the summary resampling code for virtual ensembles
 
@@ -580,3 +641,23 @@ def test_get_df_merge():
     assert "FIPNUM" in volframe
     assert "STOIIP_OIL" in volframe
     assert len(volframe["ZONE"].unique()) == 3
+
+
+def test_date_statistics():
+    """Test the statistics used in get_smry_stats() against Pandas,
+    including missing values and dates with differing number of values"""
+    dframe = pd.DataFrame(
+        {
+            "DATE": ["2001-01-01"] * 4 + ["2000-01-01"] * 3 + ["2002-01-01"],
+            "FOPT": [4.0, 1.0, np.nan, 2.5, 10.0, 0.0, 3.0, 7.0],
+            "FGPT": [np.nan, np.nan, np.nan, np.nan, 1.0, 2.0, 3.0, 4.0],
+            "ZONE": ["A"] * 8,
+        }
+    )
+    stats = _date_statistics(dframe, {"p10": 0.9, "p50": 0.5, "p90": 0.1})
+    grouped = dframe.drop(columns="ZONE").groupby("DATE")
+    pd.testing.assert_frame_equal(stats["mean"], grouped.mean())
+    pd.testing.assert_frame_equal(stats["minimum"], grouped.min())
+    pd.testing.assert_frame_equal(stats["maximum"], grouped.max())
+    for name, quantile in [("p10", 0.9), ("p50", 0.5), ("p90", 0.1)]:
+        pd.testing.assert_frame_equal(stats[name], grouped.quantile(quantile))